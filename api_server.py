@@ -0,0 +1,253 @@
+"""个人信息管理系统的 JSON API 服务（无界面）
+
+与 Streamlit 页面共用 db.py 中的连接和读写函数，运行方式：
+
+    python api_server.py --port 8000
+    PM_DB_PATH=/path/to/other.db python api_server.py
+
+接口一览（table 取 personal_info / records / honors / schedules / education / categories）：
+
+    GET    /api/{table}?limit=50&offset=0   分页查询，支持 If-None-Match 条件请求
+    POST   /api/{table}                     新增一条
+    POST   /api/{table}/batch               {"items": [...]} 多条新增，单个事务
+    PATCH  /api/{table}/batch               {"changes": [{"id", "field", "value"}]} 多条修改，单个事务，返回实际更新的行数
+                                            {"changes": [{"id", "version", "values": {...}}]} 带版本检查，冲突返回 409
+    PATCH  /api/{table}/{id}                {"field": value, ...} 修改一条，id 不存在时返回 404
+    DELETE /api/{table}/{id}                删除一条，id 不存在时返回 404
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+
+from aiohttp import web
+
+import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+READERS = {
+    "personal_info": db.get_personal_info,
+    "records": db.read_data,
+    "honors": db.get_honors,
+    "schedules": db.get_schedules,
+    "education": db.get_education,
+    "categories": db.get_categories,
+}
+
+# table -> (批量插入函数, 字段顺序, 必填字段, 默认值)
+INSERTERS = {
+    "honors": (db.insert_honors, db.HONOR_COLUMNS, ("title",),
+               {"person_id": 1, "priority": "中", "progress": 100, "attachment": ""}),
+    "schedules": (db.insert_schedules, db.SCHEDULE_COLUMNS, ("title",),
+                  {"person_id": 1, "status": "待开始", "priority": "中"}),
+    "education": (db.insert_educations, db.EDUCATION_COLUMNS, ("institution",),
+                  {"person_id": 1}),
+}
+
+DELETERS = {
+    "records": db.delete_data,
+    "honors": db.delete_honor,
+    "schedules": db.delete_schedule,
+    "education": db.delete_education,
+}
+
+
+def _table(request, allowed):
+    table = request.match_info["table"]
+    if table not in allowed:
+        raise web.HTTPNotFound(text=json.dumps({"error": f"未知的表：{table}"}, ensure_ascii=False),
+                               content_type="application/json")
+    return table
+
+
+def _bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({"error": message}, ensure_ascii=False),
+                              content_type="application/json")
+
+
+def _not_found(table, row_id):
+    return web.HTTPNotFound(text=json.dumps({"error": f"{table} 中不存在 id 为 {row_id} 的记录"}, ensure_ascii=False),
+                            content_type="application/json")
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_scalars(values):
+    """字段值必须是 JSON 标量，嵌套的数组/对象 sqlite3 无法绑定"""
+    nested = [k for k, v in values.items() if isinstance(v, (list, dict))]
+    if nested:
+        raise _bad_request(f"字段值不能是数组或对象：{', '.join(map(str, nested))}")
+
+
+def _int_param(request, name, default, upper=None):
+    try:
+        value = int(request.query.get(name, default))
+    except ValueError:
+        raise _bad_request(f"{name} 必须是整数")
+    if value < 0:
+        raise _bad_request(f"{name} 不能为负数")
+    return min(value, upper) if upper else value
+
+
+def _json_response(request, payload, status=200):
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    if request.method == "GET":
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return web.Response(status=304, headers={"ETag": etag})
+    resp = web.Response(body=body, status=status, content_type="application/json",
+                        charset="utf-8", headers={"ETag": etag})
+    # 按客户端的 Accept-Encoding 决定是否 gzip
+    resp.enable_compression()
+    return resp
+
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        raise _bad_request("请求体不是合法的 JSON")
+
+
+async def _run(func, *args):
+    """数据库调用放到线程池执行，避免阻塞事件循环"""
+    try:
+        return await asyncio.to_thread(func, *args)
+    except (ValueError, sqlite3.IntegrityError, sqlite3.ProgrammingError) as e:
+        raise _bad_request(str(e))
+
+
+def _to_row(table, item):
+    _, columns, required, defaults = INSERTERS[table]
+    if not isinstance(item, dict):
+        raise _bad_request("每条数据必须是 JSON 对象")
+    missing = [k for k in required if not item.get(k)]
+    if missing:
+        raise _bad_request(f"缺少必填字段：{', '.join(missing)}")
+    _check_scalars(item)
+    return tuple(item.get(c, defaults.get(c)) for c in columns)
+
+
+def _to_record(item):
+    if not isinstance(item, dict):
+        raise _bad_request("每条数据必须是 JSON 对象")
+    if not (item.get("title") and item.get("category")):
+        raise _bad_request("缺少必填字段：title, category")
+    _check_scalars(item)
+    return item
+
+
+async def _insert(table, items):
+    if table == "records":
+        await _run(db.insert_records, [_to_record(item) for item in items])
+    else:
+        await _run(INSERTERS[table][0], [_to_row(table, item) for item in items])
+
+
+async def list_rows(request):
+    table = _table(request, READERS)
+    limit = _int_param(request, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    offset = _int_param(request, "offset", 0)
+    df = await _run(READERS[table], limit, offset)
+    total = await _run(db.count_rows, table)
+    items = json.loads(df.to_json(orient="records", force_ascii=False))
+    return _json_response(request, {"items": items, "total": total, "limit": limit, "offset": offset})
+
+
+async def create_row(request):
+    table = _table(request, list(INSERTERS) + ["records"])
+    await _insert(table, [await _read_json(request)])
+    return _json_response(request, {"inserted": 1}, status=201)
+
+
+async def create_rows(request):
+    table = _table(request, list(INSERTERS) + ["records"])
+    body = await _read_json(request)
+    items = body.get("items") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        raise _bad_request("items 必须是非空数组")
+    await _insert(table, items)
+    return _json_response(request, {"inserted": len(items)}, status=201)
+
+
+async def update_row(request):
+    table = _table(request, db.UPDATABLE_COLUMNS)
+    row_id = int(request.match_info["id"])
+    fields = await _read_json(request)
+    if not isinstance(fields, dict) or not fields:
+        raise _bad_request("请求体必须是非空 JSON 对象")
+    _check_scalars(fields)
+    if table == "personal_info":
+        updated = await _run(db.update_personal_info, row_id, fields)
+    else:
+        changes = [{"id": row_id, "field": k, "value": v} for k, v in fields.items()]
+        updated = await _run(db.update_rows, table, changes)
+    if not updated:
+        raise _not_found(table, row_id)
+    return _json_response(request, {"updated": updated})
+
+
+async def update_rows(request):
+    table = _table(request, [t for t in db.UPDATABLE_COLUMNS if t != "personal_info"])
+    body = await _read_json(request)
+    changes = body.get("changes") if isinstance(body, dict) else None
+    if not isinstance(changes, list) or not changes:
+        raise _bad_request("changes 必须是非空数组")
+    if all(isinstance(c, dict) and {"id", "version", "values"} <= c.keys() for c in changes):
+        for change in changes:
+            if not (_is_int(change["id"]) and _is_int(change["version"])):
+                raise _bad_request("id 和 version 必须是整数")
+            if not isinstance(change["values"], dict) or not change["values"]:
+                raise _bad_request("values 必须是非空 JSON 对象")
+            _check_scalars(change["values"])
+        try:
+            await _run(db.apply_row_changes, table, changes)
+        except db.StaleRowError as e:
+            raise web.HTTPConflict(text=json.dumps({"error": str(e), "stale_ids": e.row_ids}, ensure_ascii=False),
+                                   content_type="application/json")
+        return _json_response(request, {"updated": len(changes)})
+    for change in changes:
+        if not isinstance(change, dict) or not {"id", "field", "value"} <= change.keys():
+            raise _bad_request("每条修改必须包含 id、field、value，或 id、version、values")
+        if not _is_int(change["id"]):
+            raise _bad_request("id 必须是整数")
+        if not isinstance(change["field"], str):
+            raise _bad_request("field 必须是字符串")
+        _check_scalars({change["field"]: change["value"]})
+    updated = await _run(db.update_rows, table, changes)
+    return _json_response(request, {"updated": updated})
+
+
+async def delete_row(request):
+    table = _table(request, DELETERS)
+    row_id = int(request.match_info["id"])
+    if not await _run(DELETERS[table], row_id):
+        raise _not_found(table, row_id)
+    return _json_response(request, {"deleted": 1})
+
+
+def create_app():
+    app = web.Application()
+    app.add_routes([
+        web.get("/api/{table}", list_rows),
+        web.post("/api/{table}", create_row),
+        web.post("/api/{table}/batch", create_rows),
+        web.patch("/api/{table}/batch", update_rows),
+        web.patch(r"/api/{table}/{id:\d+}", update_row),
+        web.delete(r"/api/{table}/{id:\d+}", delete_row),
+    ])
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="个人信息管理系统 JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,103 @@
+"""冷热数据分离：超过保留期的日程和记录分批移入归档库
+
+归档库在 db.init_database 中以 archive 为名挂到同一个连接上，平时的查询只读主库，
+需要看历史时 get_schedules / read_data 传 include_archive=True 即可把归档行 UNION 进来。
+
+    python archive.py                     # 按默认保留期归档并回收空间
+    python archive.py --schedules-days 7 --records-days 180
+"""
+import argparse
+import sqlite3
+from datetime import datetime, timedelta
+
+import db
+
+# 保留期（天）以及判定“可以归档”的条件；? 处绑定截止日期。
+# 表单把没填的时间存成空字符串，'' 比任何日期都小，必须先用 nullif 当成 NULL
+RETENTION_DAYS = {"schedules": 30, "records": 365}
+RETENTION_RULES = {
+    "schedules": "status IN ('已完成', '已取消')"
+                 " AND coalesce(nullif(end_time, ''), nullif(start_time, ''), created_at) < ?",
+    "records": "coalesce(progress, 0) >= 100 AND nullif(created_at, '') < ?",
+}
+BATCH_SIZE = 500
+
+
+def archive_table(table, days=None, batch_size=BATCH_SIZE):
+    """把 table 中超过保留期的行分批移到归档库，返回移动的行数
+
+    WAL 模式下挂载的两个库是分别提交的（主库在前），放在一个事务里时进程若在两次提交
+    之间被杀，主库的删除已落盘而归档库的插入没有，这批行就丢了。所以每批拆成两个事务：
+    先把行复制到归档库并提交，再只删除主库中已确实存在于归档库的行。中途中断最多
+    留下两边都有的行，重跑时 INSERT OR IGNORE 跳过它们，再从主库删掉。
+    """
+    days = RETENTION_DAYS[table] if days is None else days
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    cols = ", ".join(db.table_columns(db.conn, table))
+    moved = 0
+    while True:
+        # 每批单独拿锁，归档期间页面上的写操作可以插进来；复制和删除之间不放锁，
+        # 避免复制后主库的行又被修改
+        with db.db_lock:
+            ids = [row[0] for row in db.conn.execute(
+                f"SELECT id FROM main.{table} WHERE {RETENTION_RULES[table]} ORDER BY id LIMIT ?",
+                (cutoff, batch_size))]
+            if not ids:
+                break
+            placeholders = ", ".join("?" for _ in ids)
+            with db.conn:
+                db.conn.execute(f"""
+                INSERT OR IGNORE INTO archive.{table} ({cols}, archived_at)
+                SELECT {cols}, datetime('now') FROM main.{table} WHERE id IN ({placeholders})
+                """, ids)
+            with db.conn:
+                moved += db.conn.execute(f"""
+                DELETE FROM main.{table}
+                WHERE id IN (SELECT id FROM archive.{table} WHERE id IN ({placeholders}))
+                """, ids).rowcount
+    return moved
+
+
+def archive_expired(retention=None, batch_size=BATCH_SIZE):
+    """按保留期归档所有可归档的表，返回 {表名: 移动行数}"""
+    retention = {**RETENTION_DAYS, **(retention or {})}
+    return {table: archive_table(table, retention[table], batch_size) for table in db.ARCHIVED_TABLES}
+
+
+def compact_database():
+    """回收主库空间：首次把 auto_vacuum 切到 INCREMENTAL 并整体 VACUUM，之后只做 incremental_vacuum
+
+    其他连接有未结束的读写时 VACUUM 会失败并抛出 sqlite3.OperationalError，由调用方报告，稍后重试即可。
+    """
+    with db.db_lock:
+        mode = db.conn.execute("PRAGMA main.auto_vacuum").fetchone()[0]
+        if mode == 2:
+            db.conn.execute("PRAGMA main.incremental_vacuum").fetchall()
+            return "incremental_vacuum"
+        db.conn.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+        db.conn.execute("VACUUM main")
+        return "vacuum"
+
+
+def archive_counts():
+    """返回 {表名: (主库行数, 归档库行数)}"""
+    return {
+        table: (db.read_conn().execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0],
+                db.read_conn().execute(f"SELECT COUNT(*) FROM archive.{table}").fetchone()[0])
+        for table in db.ARCHIVED_TABLES
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="归档超过保留期的日程和记录")
+    parser.add_argument("--schedules-days", type=int, default=RETENTION_DAYS["schedules"])
+    parser.add_argument("--records-days", type=int, default=RETENTION_DAYS["records"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    result = archive_expired({"schedules": args.schedules_days, "records": args.records_days}, args.batch_size)
+    for table, moved in result.items():
+        print(f"{table}: 归档 {moved} 行")
+    try:
+        print(f"空间回收方式: {compact_database()}")
+    except sqlite3.OperationalError as e:
+        print(f"空间回收未完成，请稍后重试: {e}")
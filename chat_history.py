@@ -0,0 +1,54 @@
+"""AI助手的对话记录：消息持久化到 chat_messages，页面只保留最近的一段窗口
+
+较早的轮次被压缩成每条一行的摘要（chat_summaries），和最近几条原文一起
+作为上下文放进 prompt，这样 prompt 长度和会话内存都不会随对话增长。
+"""
+import db
+
+CHAT_WINDOW = 20            # 页面默认显示、每次“加载更早的消息”追加的条数
+CHAT_MAX_LOADED = 200       # 单个会话在 session_state 中最多保留的消息条数
+CONTEXT_MESSAGES = 6        # 原文放进 prompt 的最近消息条数
+SUMMARY_MAX_CHARS = 1000
+LINE_MAX_CHARS = 60
+ROLE_LABELS = {"user": "用户", "assistant": "助手"}
+
+
+def load_window(session_id, before_id=None, limit=CHAT_WINDOW):
+    return db.get_chat_messages(session_id, limit, before_id=before_id)
+
+
+def append_message(messages, session_id, role, content):
+    """持久化一条消息并追加到会话窗口，超过上限时丢弃窗口里最早的消息"""
+    msg_id = db.insert_chat_message(session_id, role, content)
+    messages.append({"id": msg_id, "role": role, "content": content})
+    del messages[:-CHAT_MAX_LOADED]
+    return msg_id
+
+
+def compact_line(message):
+    text = " ".join(message["content"].split())
+    if len(text) > LINE_MAX_CHARS:
+        text = text[:LINE_MAX_CHARS] + "…"
+    return f"{ROLE_LABELS.get(message['role'], message['role'])}：{text}"
+
+
+def build_context(session_id, before_id=None):
+    """返回 before_id 之前的对话上下文：较早轮次的摘要 + 最近几条原文"""
+    recent = db.get_chat_messages(session_id, CONTEXT_MESSAGES, before_id=before_id)
+    summary, upto_id = db.get_chat_summary(session_id)
+    if recent:
+        # 滑出最近窗口、尚未并入摘要的消息，增量追加到摘要末尾
+        older = db.get_chat_messages(session_id, before_id=recent[0]["id"], after_id=upto_id)
+        if older:
+            summary = "\n".join(([summary] if summary else []) + [compact_line(m) for m in older])
+            if len(summary) > SUMMARY_MAX_CHARS:
+                summary = summary[-SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+            db.save_chat_summary(session_id, summary, older[-1]["id"])
+
+    parts = []
+    if summary:
+        parts.append("较早的对话摘要：\n" + summary)
+    if recent:
+        parts.append("最近的对话：\n" + "\n".join(
+            f"{ROLE_LABELS.get(m['role'], m['role'])}：{m['content']}" for m in recent))
+    return "\n\n".join(parts)
@@ -0,0 +1,541 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+DB_PATH = Path(os.environ.get("PM_DB_PATH") or DATA_DIR / "personal_management.db")
+ARCHIVE_PATH = DB_PATH.with_name(DB_PATH.stem + "_archive.db")
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# 各表插入时使用的字段顺序（insert_xxx 接收的元组按此顺序排列）
+HONOR_COLUMNS = ("person_id", "category_id", "title", "description", "issuing_authority",
+                 "issue_date", "priority", "progress", "attachment")
+SCHEDULE_COLUMNS = ("person_id", "title", "description", "start_time", "end_time",
+                    "location", "status", "priority", "reminder")
+EDUCATION_COLUMNS = ("person_id", "institution", "degree", "major", "start_date",
+                     "end_date", "gpa", "achievements")
+RECORD_COLUMNS = ("person_id", "title", "category", "notes", "priority", "progress",
+                  "created_at", "attachment")
+
+# 允许通过 update_xxx 修改的字段（字段名会拼进 SQL，必须走白名单）
+UPDATABLE_COLUMNS = {
+    "personal_info": ("name", "gender", "birth_date", "email", "phone", "address",
+                      "occupation", "education_level"),
+    "records": ("title", "category", "notes", "priority", "progress", "attachment"),
+    "schedules": ("title", "description", "start_time", "end_time", "location",
+                  "status", "priority", "reminder"),
+    "honors": ("category_id", "title", "description", "issuing_authority", "issue_date",
+               "priority", "progress", "attachment"),
+    "education": ("institution", "degree", "major", "start_date", "end_date", "gpa", "achievements"),
+}
+
+# 可以移入归档库的表，归档逻辑见 archive.py
+ARCHIVED_TABLES = ("schedules", "records")
+
+# 由触发器维护整表数据版本号的表（data_versions），报告缓存据此判断是否需要重新生成
+TRACKED_TABLES = ("personal_info", "categories", "honors", "schedules", "education", "records")
+
+# 带 version 行版本号的表，批量编辑时用它做乐观并发检查
+VERSIONED_TABLES = ("records", "honors", "schedules", "education")
+
+
+class StaleRowError(Exception):
+    """批量编辑时部分行已被他人修改或删除，整批已回滚"""
+
+    def __init__(self, table, row_ids):
+        super().__init__(f"{table} 中的记录 {row_ids} 已被修改或删除")
+        self.table = table
+        self.row_ids = row_ids
+
+
+def table_columns(conn, table, schema="main"):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _sync_archive_table(conn, table):
+    """归档表与主表字段保持一致，另加 archived_at"""
+    main_columns = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+    archived = table_columns(conn, table, "archive")
+    if not archived:
+        defs = ", ".join(f"{name} {col_type}" + (" PRIMARY KEY" if pk else "")
+                         for _, name, col_type, _, _, pk in main_columns)
+        conn.execute(f"CREATE TABLE archive.{table} ({defs}, archived_at TEXT)")
+    else:
+        for _, name, col_type, *_ in main_columns:
+            if name not in archived:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {col_type}")
+
+
+def init_database(db_path=DB_PATH, archive_path=None):
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    # WAL 模式下 Streamlit 与 API 服务可以同时读写同一个库
+    conn.execute("PRAGMA journal_mode=WAL")
+    cursor = conn.cursor()
+
+    cursor.executescript("""
+    -- 个人基本信息表
+    CREATE TABLE IF NOT EXISTS personal_info (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        gender TEXT,
+        birth_date TEXT,
+        email TEXT,
+        phone TEXT,
+        address TEXT,
+        occupation TEXT,
+        education_level TEXT,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+
+    -- 分类表
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT
+    );
+
+    -- 荣誉信息表
+    CREATE TABLE IF NOT EXISTS honors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER NOT NULL,
+        category_id INTEGER,
+        title TEXT NOT NULL,
+        description TEXT,
+        issuing_authority TEXT,
+        issue_date TEXT,
+        priority TEXT DEFAULT '中',
+        progress INTEGER DEFAULT 100,
+        attachment TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        FOREIGN KEY (person_id) REFERENCES personal_info(id) ON DELETE CASCADE,
+        FOREIGN KEY (category_id) REFERENCES categories(id)
+    );
+
+    -- 日程信息表
+    CREATE TABLE IF NOT EXISTS schedules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        location TEXT,
+        status TEXT DEFAULT '待完成',
+        priority TEXT DEFAULT '中',
+        reminder TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        FOREIGN KEY (person_id) REFERENCES personal_info(id) ON DELETE CASCADE
+    );
+
+    -- 教育经历表
+    CREATE TABLE IF NOT EXISTS education (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER NOT NULL,
+        institution TEXT NOT NULL,
+        degree TEXT,
+        major TEXT,
+        start_date TEXT,
+        end_date TEXT,
+        gpa REAL,
+        achievements TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        FOREIGN KEY (person_id) REFERENCES personal_info(id) ON DELETE CASCADE
+    );
+
+    -- 原记录表保持不变
+    CREATE TABLE IF NOT EXISTS records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        person_id INTEGER DEFAULT 1,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        notes TEXT,
+        priority TEXT,
+        progress INTEGER,
+        created_at TEXT,
+        attachment TEXT,
+        FOREIGN KEY (person_id) REFERENCES personal_info(id)
+    );
+
+    -- AI助手对话记录
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages(session_id, id);
+
+    -- 较早对话的压缩摘要，upto_id 之前（含）的消息已并入摘要
+    CREATE TABLE IF NOT EXISTS chat_summaries (
+        session_id TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        upto_id INTEGER NOT NULL
+    );
+    """)
+
+    cursor.execute("SELECT COUNT(*) FROM personal_info")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+        INSERT INTO personal_info (name, gender, birth_date, email, phone, address, occupation, education_level)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, ("胡一心", "男", "2025-01-01", "54088@email.com", "666666", "上海杨浦", "雅典娜", "本科"))
+
+        default_categories = [
+            ('学术荣誉', '奖学金、学术竞赛等奖项'),
+            ('工作成就', '工作相关的奖励和成就'),
+            ('技能证书', '各类技能认证证书'),
+            ('项目经验', '完成的重要项目'),
+            ('其他荣誉', '其他类型的荣誉和成就')
+        ]
+        cursor.executemany("INSERT INTO categories (name, description) VALUES (?, ?)", default_categories)
+
+    # 旧库升级：补上行版本号字段
+    for table in VERSIONED_TABLES:
+        columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+        if "version" not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    for table in TRACKED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)", (table,))
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_version AFTER {op} ON {table}
+            BEGIN
+                UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+            END
+            """)
+    conn.commit()
+
+    # 冷数据放在单独的归档库里，挂到同一个连接上，查询历史时直接 UNION
+    archive_path = archive_path or ARCHIVE_PATH
+    conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path),))
+    conn.execute("PRAGMA archive.journal_mode=WAL")
+    for table in ARCHIVED_TABLES:
+        _sync_archive_table(conn, table)
+    conn.commit()
+    return conn
+
+
+# 写操作整个进程共用一个连接（Streamlit 各会话、API 服务都从这里取），
+# 通过 db_lock 串行化，避免不同线程的事务交错提交；读操作走 read_conn()
+conn = init_database()
+cursor = conn.cursor()
+db_lock = threading.RLock()
+
+_readers = threading.local()
+
+
+def read_conn():
+    """当前线程专用的读连接
+
+    读操作不走共用的 conn：那上面可能有别的线程尚未提交（甚至随后会回滚）的事务，
+    WAL 模式下独立连接只会看到已提交的数据，读也不需要排队等 db_lock。
+    """
+    reader = getattr(_readers, "conn", None)
+    if reader is None:
+        reader = _readers.conn = sqlite3.connect(DB_PATH, timeout=30)
+        reader.execute("ATTACH DATABASE ? AS archive", (str(ARCHIVE_PATH),))
+    return reader
+
+
+def _paged(query, limit=None, offset=0):
+    """在查询语句后追加分页子句"""
+    if limit is None:
+        return pd.read_sql_query(query, read_conn())
+    return pd.read_sql_query(query + " LIMIT ? OFFSET ?", read_conn(), params=(int(limit), int(offset)))
+
+
+def _insert_sql(table, columns):
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def _check_columns(table, fields):
+    allowed = UPDATABLE_COLUMNS[table]
+    for field in fields:
+        if field not in allowed:
+            raise ValueError(f"不允许修改 {table}.{field}")
+
+
+def _with_archive(table, include_archive):
+    """include_archive 时把归档库里的行 UNION 进来，并用 archived 列标出"""
+    if not include_archive:
+        return table
+    cols = ", ".join(table_columns(read_conn(), table))
+    return f"(SELECT {cols}, 0 AS archived FROM main.{table} UNION ALL SELECT {cols}, 1 FROM archive.{table})"
+
+
+def get_data_versions(tables=TRACKED_TABLES, connection=None):
+    """返回 {表名: 数据版本号}，表中任意行增删改后版本号都会增加"""
+    placeholders = ", ".join("?" for _ in tables)
+    rows = (connection or read_conn()).execute(
+        f"SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders})", tuple(tables))
+    return dict(rows.fetchall())
+
+
+def count_rows(table):
+    """统计表的记录数"""
+    return read_conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def get_personal_info(limit=None, offset=0):
+    """获取个人信息"""
+    return _paged("SELECT * FROM personal_info ORDER BY id", limit, offset)
+
+
+def update_personal_info(info_id, update_dict):
+    """更新个人信息，返回受影响的行数"""
+    _check_columns("personal_info", update_dict.keys())
+    set_clause = ", ".join([f"{key} = ?" for key in update_dict.keys()])
+    values = list(update_dict.values())
+    values.append(info_id)
+
+    query = f"UPDATE personal_info SET {set_clause} WHERE id = ?"
+    with db_lock, conn:
+        return conn.execute(query, values).rowcount
+
+
+def insert_honor(honor_data):
+    """插入荣誉信息"""
+    insert_honors([honor_data])
+
+
+def insert_honors(honor_rows):
+    """批量插入荣誉信息（单个事务）"""
+    with db_lock, conn:
+        conn.executemany(_insert_sql("honors", HONOR_COLUMNS), honor_rows)
+
+
+def get_honors(limit=None, offset=0):
+    """获取所有荣誉信息（带分类信息）"""
+    return _paged("""
+    SELECT h.*, c.name as category_name, p.name as person_name
+    FROM honors h
+    LEFT JOIN categories c ON h.category_id = c.id
+    LEFT JOIN personal_info p ON h.person_id = p.id
+    ORDER BY h.issue_date DESC, h.id DESC
+    """, limit, offset)
+
+
+def update_honor(honor_id, field, value):
+    """更新荣誉信息"""
+    update_rows("honors", [{"id": honor_id, "field": field, "value": value}])
+
+
+def delete_honor(honor_id):
+    """删除荣誉信息，返回删除的行数"""
+    with db_lock, conn:
+        return conn.execute("DELETE FROM honors WHERE id=?", (honor_id,)).rowcount
+
+
+def insert_schedule(schedule_data):
+    """插入日程信息"""
+    insert_schedules([schedule_data])
+
+
+def insert_schedules(schedule_rows):
+    """批量插入日程信息（单个事务）"""
+    with db_lock, conn:
+        conn.executemany(_insert_sql("schedules", SCHEDULE_COLUMNS), schedule_rows)
+
+
+def get_schedules(limit=None, offset=0, include_archive=False):
+    """获取所有日程信息（include_archive 时包含已归档的历史日程）"""
+    return _paged(f"""
+    SELECT s.*, p.name as person_name
+    FROM {_with_archive("schedules", include_archive)} s
+    LEFT JOIN personal_info p ON s.person_id = p.id
+    ORDER BY s.start_time, s.id
+    """, limit, offset)
+
+
+def update_schedule(schedule_id, field, value):
+    """更新日程信息"""
+    update_rows("schedules", [{"id": schedule_id, "field": field, "value": value}])
+
+
+def delete_schedule(schedule_id):
+    """删除日程信息，返回删除的行数"""
+    with db_lock, conn:
+        return conn.execute("DELETE FROM schedules WHERE id=?", (schedule_id,)).rowcount
+
+
+def insert_education(education_data):
+    """插入教育经历"""
+    insert_educations([education_data])
+
+
+def insert_educations(education_rows):
+    """批量插入教育经历（单个事务）"""
+    with db_lock, conn:
+        conn.executemany(_insert_sql("education", EDUCATION_COLUMNS), education_rows)
+
+
+def get_education(limit=None, offset=0):
+    """获取所有教育经历"""
+    return _paged("""
+    SELECT e.*, p.name as person_name
+    FROM education e
+    LEFT JOIN personal_info p ON e.person_id = p.id
+    ORDER BY e.start_date DESC, e.id DESC
+    """, limit, offset)
+
+
+def delete_education(education_id):
+    """删除教育经历，返回删除的行数"""
+    with db_lock, conn:
+        return conn.execute("DELETE FROM education WHERE id=?", (education_id,)).rowcount
+
+
+def get_categories(limit=None, offset=0):
+    """获取分类信息"""
+    return _paged("SELECT * FROM categories ORDER BY id", limit, offset)
+
+
+def insert_batch(honor_rows=(), education_rows=(), schedule_rows=()):
+    """荣誉、教育经历、日程一起插入，全部成功或全部回滚"""
+    with db_lock, conn:
+        conn.executemany(_insert_sql("honors", HONOR_COLUMNS), honor_rows)
+        conn.executemany(_insert_sql("education", EDUCATION_COLUMNS), education_rows)
+        conn.executemany(_insert_sql("schedules", SCHEDULE_COLUMNS), schedule_rows)
+
+
+def update_rows(table, changes):
+    """批量更新（单个事务）；changes 为 [{"id", "field", "value"}, ...]，返回实际更新的行数"""
+    _check_columns(table, {c["field"] for c in changes})
+    updated = set()
+    with db_lock, conn:
+        for change in changes:
+            cur = conn.execute(f"UPDATE {table} SET {change['field']}=?, version=version+1 WHERE id=?",
+                               (change["value"], change["id"]))
+            if cur.rowcount:
+                updated.add(change["id"])
+    return len(updated)
+
+
+def _py(value):
+    """DataFrame 单元格转成 sqlite3 能绑定的 Python 值"""
+    if value is None or (isinstance(value, float) and value != value) or value is pd.NA or value is pd.NaT:
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def diff_rows(original, edited, columns):
+    """逐单元格比较编辑前后的表格，返回 apply_row_changes 需要的改动列表"""
+    before = original.set_index("id")
+    after = edited.set_index("id")
+    changes = []
+    for row_id in after.index.intersection(before.index):
+        values = {}
+        for col in columns:
+            old, new = _py(before.at[row_id, col]), _py(after.at[row_id, col])
+            if old != new:
+                values[col] = new
+        if values:
+            changes.append({"id": int(row_id), "version": int(before.at[row_id, "version"]), "values": values})
+    return changes
+
+
+def apply_row_changes(table, changes):
+    """按行应用改动（单个事务）；changes 为 [{"id", "version", "values": {字段: 值}}, ...]
+
+    只有 version 与读取时一致的行才会被更新，任一行版本不符时整批回滚并抛出 StaleRowError。
+    """
+    _check_columns(table, {field for c in changes for field in c["values"]})
+    with db_lock, conn:
+        stale = []
+        for change in changes:
+            fields = list(change["values"])
+            set_clause = ", ".join(f"{field}=?" for field in fields)
+            params = [change["values"][f] for f in fields] + [change["id"], change["version"]]
+            cur = conn.execute(f"UPDATE {table} SET {set_clause}, version=version+1 WHERE id=? AND version=?",
+                               params)
+            if cur.rowcount == 0:
+                stale.append(change["id"])
+        if stale:
+            raise StaleRowError(table, stale)
+
+
+# === 保持原有的数据操作函数 ===
+def read_data(limit=None, offset=0, include_archive=False):
+    return _paged(
+        f"SELECT r.*, p.name as person_name FROM {_with_archive('records', include_archive)} r"
+        " LEFT JOIN personal_info p ON r.person_id = p.id ORDER BY r.id", limit, offset)
+
+
+def _record_row(record):
+    return (
+        1,  # 默认关联到第一个个人信息
+        record.get("title"), record.get("category"), record.get("notes"),
+        record.get("priority"), record.get("progress"),
+        record.get("created_at"), record.get("attachment")
+    )
+
+
+def insert_data(record):
+    insert_records([record])
+
+
+def insert_records(records):
+    """批量插入通用记录（单个事务）"""
+    with db_lock, conn:
+        conn.executemany(_insert_sql("records", RECORD_COLUMNS), [_record_row(r) for r in records])
+
+
+def update_data(record_id, field, value):
+    update_rows("records", [{"id": record_id, "field": field, "value": value}])
+
+
+def delete_data(record_id):
+    with db_lock, conn:
+        return conn.execute("DELETE FROM records WHERE id=?", (record_id,)).rowcount
+
+
+def insert_chat_message(session_id, role, content):
+    """保存一条对话消息，返回消息 id"""
+    with db_lock, conn:
+        return conn.execute("INSERT INTO chat_messages (session_id, role, content) VALUES (?, ?, ?)",
+                            (session_id, role, content)).lastrowid
+
+
+def get_chat_messages(session_id, limit=None, before_id=None, after_id=None):
+    """按时间顺序返回 (after_id, before_id) 区间内最近的 limit 条消息"""
+    rows = read_conn().execute("""
+    SELECT id, role, content FROM chat_messages
+    WHERE session_id = ? AND (? IS NULL OR id < ?) AND (? IS NULL OR id > ?)
+    ORDER BY id DESC LIMIT ?
+    """, (session_id, before_id, before_id, after_id, after_id, -1 if limit is None else limit)).fetchall()
+    return [{"id": i, "role": role, "content": content} for i, role, content in reversed(rows)]
+
+
+def count_chat_messages(session_id, before_id=None):
+    """统计会话中 before_id 之前的消息数"""
+    return read_conn().execute(
+        "SELECT COUNT(*) FROM chat_messages WHERE session_id = ? AND (? IS NULL OR id < ?)",
+        (session_id, before_id, before_id)).fetchone()[0]
+
+
+def get_chat_summary(session_id):
+    """返回 (摘要, 已并入摘要的最后一条消息 id)"""
+    row = read_conn().execute("SELECT summary, upto_id FROM chat_summaries WHERE session_id = ?",
+                       (session_id,)).fetchone()
+    return row if row else ("", None)
+
+
+def save_chat_summary(session_id, summary, upto_id):
+    with db_lock, conn:
+        conn.execute("""
+        INSERT INTO chat_summaries (session_id, summary, upto_id) VALUES (?, ?, ?)
+        ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, upto_id = excluded.upto_id
+        """, (session_id, summary, upto_id))
@@ -0,0 +1,197 @@
+"""AI助手的批量导入：把简历或获奖清单拆成条目，并发交给模型解析后统一入库
+
+    categories = db.get_categories()
+    category_ids = dict(zip(categories["name"], categories["id"]))
+    items = split_items(text)
+    results = extract_items(items, category_ids, max_workers=4, rate=2.0)
+    honor_rows, education_rows, schedule_rows = to_rows(results, category_ids)
+    db.insert_batch(honor_rows, education_rows, schedule_rows)
+
+本地调试时可以先启动 stub_llm_server.py，再设置 LLM_API_URL 指向它。
+"""
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from llm import LLMError, chat_completion, parse_json_reply
+
+INGEST_TABLES = ("honors", "education", "schedules")
+
+# 每张表允许模型填写的字段；必填字段缺失的条目不会被默认勾选导入
+INGEST_FIELDS = {
+    "honors": ("title", "category", "description", "issuing_authority", "issue_date", "priority", "progress"),
+    "education": ("institution", "degree", "major", "start_date", "end_date", "gpa", "achievements"),
+    "schedules": ("title", "description", "start_time", "end_time", "location", "status", "priority"),
+}
+REQUIRED_FIELDS = {
+    "honors": ("title",),
+    "education": ("institution",),
+    "schedules": ("title", "start_time"),
+}
+PRIORITIES = ("低", "中", "高")
+SCHEDULE_STATUSES = ("待开始", "进行中", "已完成", "已取消")
+DEFAULT_HONOR_CATEGORY = "其他荣誉"
+
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·]|\d+\s*[.、)）]|[（(]\d+[)）])\s*")
+_DATE_RE = re.compile(r"^\d{4}(-\d{1,2}(-\d{1,2}( \d{1,2}:\d{2})?)?)?$")
+
+INGEST_PROMPT = """
+你是一个信息录入助手。下面是用户简历或清单中的一条内容，请判断它属于哪张表并提取字段：
+- honors(title, category, description, issuing_authority, issue_date, priority, progress)
+  category 取值：{categories}
+- education(institution, degree, major, start_date, end_date, gpa, achievements)
+- schedules(title, description, start_time, end_time, location, status, priority)
+
+日期使用 YYYY-MM-DD，时间使用 YYYY-MM-DD HH:MM，priority 取 低/中/高，无法确定的字段填 null。
+只返回一个JSON对象，不要附加说明：
+{{"table": "honors" | "education" | "schedules", "data": {{...}}}}
+内容：{item}
+"""
+
+
+def split_items(text):
+    """按行（以及中英文分号）拆分条目，去掉列表符号和编号"""
+    items = []
+    for line in re.split(r"[\r\n；;]+", text):
+        line = _BULLET_RE.sub("", line).strip()
+        if line:
+            items.append(line)
+    return items
+
+
+class RateLimiter:
+    """令牌桶限流：平均每秒最多 rate 次请求，允许 burst 次突发"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # 先预占一个令牌再睡眠，后来的线程会自动排到更靠后的时间
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+def _clean(value):
+    """规整单个字段：空值转 None；模型偶尔返回的列表/对象转成字符串，sqlite3 无法直接绑定它们"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (list, tuple)):
+        value = "、".join(str(v) for v in value if v is not None)
+    elif isinstance(value, dict):
+        value = json.dumps(value, ensure_ascii=False)
+    elif not isinstance(value, (str, int, float)):
+        value = str(value)
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+
+def validate_item(table, data, category_ids):
+    """校验并规整一条解析结果，返回 (data, errors)"""
+    errors = []
+    if table not in INGEST_TABLES:
+        return {}, [f"无法识别的表：{table}"]
+    if not isinstance(data, dict):
+        return {}, ["data 不是JSON对象"]
+
+    data = {field: _clean(data.get(field)) for field in INGEST_FIELDS[table]}
+    for field in REQUIRED_FIELDS[table]:
+        if not data[field]:
+            errors.append(f"缺少{field}")
+    for field in ("issue_date", "start_date", "end_date", "start_time", "end_time"):
+        if data.get(field) is not None:
+            data[field] = str(data[field])
+            if not _DATE_RE.match(data[field]):
+                errors.append(f"{field} 格式应为 YYYY-MM-DD")
+
+    if "priority" in data and data["priority"] not in PRIORITIES:
+        data["priority"] = "中"
+    if table == "honors":
+        if data["category"] not in category_ids:
+            data["category"] = DEFAULT_HONOR_CATEGORY
+        try:
+            data["progress"] = min(100, max(0, int(data["progress"] if data["progress"] is not None else 100)))
+        except (TypeError, ValueError):
+            errors.append("progress 应为 0-100 的整数")
+    elif table == "education" and data["gpa"] is not None:
+        try:
+            data["gpa"] = float(data["gpa"])
+        except (TypeError, ValueError):
+            errors.append("gpa 应为数字")
+    elif table == "schedules" and data["status"] not in SCHEDULE_STATUSES:
+        data["status"] = "待开始"
+    return data, errors
+
+
+def _extract_one(item, category_ids, limiter, local, retries):
+    prompt = INGEST_PROMPT.format(categories="/".join(category_ids), item=item)
+    if not hasattr(local, "session"):
+        local.session = requests.Session()
+
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            parsed = parse_json_reply(chat_completion(prompt, temperature=0, session=local.session))
+            break
+        except LLMError as e:
+            if not e.retryable or attempt == retries:
+                return {"source": item, "table": None, "data": {}, "errors": [str(e)]}
+            time.sleep(0.5 * 2 ** attempt)
+        except json.JSONDecodeError:
+            return {"source": item, "table": None, "data": {}, "errors": ["AI返回格式错误"]}
+
+    if not isinstance(parsed, dict):
+        return {"source": item, "table": None, "data": {}, "errors": ["AI返回格式错误"]}
+    table = parsed.get("table")
+    data, errors = validate_item(table, parsed.get("data"), category_ids)
+    return {"source": item, "table": table, "data": data, "errors": errors}
+
+
+def _extract_one_safe(item, category_ids, limiter, local, retries):
+    """任何意外异常都只记在这一条的 errors 里，不让整批结果丢失"""
+    try:
+        return _extract_one(item, category_ids, limiter, local, retries)
+    except Exception as e:
+        return {"source": item, "table": None, "data": {}, "errors": [f"解析失败：{e!r}"]}
+
+
+def extract_items(items, category_ids, max_workers=4, rate=2.0, retries=2):
+    """并发解析条目，最多 max_workers 个请求同时进行、每秒不超过 rate 个，结果顺序与输入一致
+
+    category_ids 为荣誉分类名到 id 的映射，用于校验 category 字段。
+    """
+    limiter = RateLimiter(rate, burst=max_workers)
+    local = threading.local()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(lambda item: _extract_one_safe(item, category_ids, limiter, local, retries), items))
+
+
+def to_rows(results, category_ids, person_id=1):
+    """把校验通过的结果转换成 insert_batch 需要的三组元组"""
+    honor_rows, education_rows, schedule_rows = [], [], []
+    for result in results:
+        data = result["data"]
+        if result["table"] == "honors":
+            honor_rows.append((person_id, category_ids.get(data["category"]), data["title"], data["description"],
+                               data["issuing_authority"], data["issue_date"], data["priority"], data["progress"], ""))
+        elif result["table"] == "education":
+            education_rows.append((person_id, data["institution"], data["degree"], data["major"],
+                                   data["start_date"], data["end_date"], data["gpa"], data["achievements"]))
+        elif result["table"] == "schedules":
+            schedule_rows.append((person_id, data["title"], data["description"], data["start_time"],
+                                  data["end_time"], data["location"], data["status"], data["priority"], ""))
+    return honor_rows, education_rows, schedule_rows
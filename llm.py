@@ -0,0 +1,57 @@
+import json
+import os
+import re
+
+import requests
+
+# 通过环境变量可以切换到本地的模型桩服务（见 stub_llm_server.py）；密钥只从环境变量读取
+LLM_API_URL = os.environ.get("LLM_API_URL", "https://api.deepseek.com/v1/chat/completions")
+LLM_API_KEY = os.environ.get("LLM_API_KEY", "")
+LLM_MODEL = os.environ.get("LLM_MODEL", "deepseek-chat")
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class LLMError(Exception):
+    """模型服务返回错误或空响应"""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def chat_completion(prompt, temperature=0.2, timeout=30, session=None):
+    """调用 chat/completions 接口，返回模型回复的文本"""
+    headers = {"Content-Type": "application/json"}
+    if LLM_API_KEY:
+        headers["Authorization"] = f"Bearer {LLM_API_KEY}"
+    payload = {
+        "model": LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature
+    }
+    try:
+        response = (session or requests).post(LLM_API_URL, headers=headers, json=payload, timeout=timeout)
+    except requests.RequestException as e:
+        raise LLMError(f"请求模型服务失败：{e}", retryable=True)
+    if response.status_code in (401, 403):
+        raise LLMError("模型服务拒绝访问，请检查 LLM_API_KEY 环境变量")
+    if response.status_code == 429 or response.status_code >= 500:
+        raise LLMError(f"模型服务繁忙（HTTP {response.status_code}）", retryable=True)
+    try:
+        result = response.json()
+    except ValueError:
+        raise LLMError("AI响应不是合法的 JSON")
+
+    try:
+        content = result["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        raise LLMError("AI响应为空")
+    if not isinstance(content, str):
+        raise LLMError("AI响应为空")
+    return content.strip()
+
+
+def parse_json_reply(reply):
+    """解析模型返回的 JSON，兼容 ```json 代码块包裹的写法"""
+    return json.loads(_FENCE_RE.sub("", reply.strip()))
@@ -0,0 +1,78 @@
+"""API 服务压测脚本，统计每秒请求数和延迟分位数
+
+    python api_server.py --port 8000 &
+    python loadtest_api.py --url http://127.0.0.1:8000 --concurrency 20 --duration 10
+    python loadtest_api.py --write-ratio 0.1     # 10% 的请求走批量写入
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import aiohttp
+
+from loadtest_stats import percentile
+
+READ_PATHS = [
+    "/api/records?limit=50",
+    "/api/honors?limit=50",
+    "/api/schedules?limit=50",
+    "/api/education?limit=50",
+    "/api/personal_info",
+]
+
+
+async def worker(session, base_url, deadline, write_ratio, use_etag, latencies, statuses):
+    etags = {}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if random.random() < write_ratio:
+            items = [{"title": f"压测日程{random.randint(0, 10 ** 6)}", "start_time": "2030-01-01 09:00"}
+                     for _ in range(10)]
+            request = session.post(f"{base_url}/api/schedules/batch", json={"items": items})
+        else:
+            path = random.choice(READ_PATHS)
+            headers = {"Accept-Encoding": "gzip"}
+            if use_etag and path in etags:
+                headers["If-None-Match"] = etags[path]
+            request = session.get(base_url + path, headers=headers)
+        try:
+            async with request as resp:
+                await resp.read()
+                if resp.method == "GET" and "ETag" in resp.headers:
+                    etags[str(resp.url.relative())] = resp.headers["ETag"]
+                statuses[resp.status] += 1
+        except aiohttp.ClientError as e:
+            statuses[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+async def main(args):
+    latencies, statuses = [], Counter()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(session, args.url.rstrip("/"), deadline, args.write_ratio, args.etag, latencies, statuses)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    print(f"并发数: {args.concurrency}  时长: {elapsed:.1f}s  请求数: {len(latencies)}")
+    print(f"吞吐量: {len(latencies) / elapsed:.1f} req/s")
+    print("延迟(ms): " + "  ".join(
+        f"p{p}={percentile(latencies, p) * 1000:.1f}" for p in (50, 90, 95, 99)))
+    print("状态码: " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items(), key=str)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API 服务压测")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.0)
+    parser.add_argument("--etag", action="store_true", help="复用上次的 ETag 发送条件请求")
+    args = parser.parse_args()
+    asyncio.run(main(args))
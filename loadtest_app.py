@@ -0,0 +1,342 @@
+"""Streamlit 页面并发压测：用 streamlit.testing.v1.AppTest 无界面地模拟多个会话
+
+每个会话在独立线程中依次点击侧边栏的各个页面，并在相应页面提交表单、搜索，
+结束后输出每个页面 rerun 延迟的分位数、Python db_lock 的争用、应用自己的 SQLite 连接上
+阻塞超过阈值的语句数（锁等待）以及每个会话的内存占用。
+
+    python loadtest_app.py --sessions 10 --rounds 3
+    python loadtest_app.py --sessions 20 --seed-rows 5000 --external-writer --slow-ms 20
+
+默认在临时目录中新建并预填数据库，不会动 data/ 下的真实数据。
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from loadtest_stats import percentile
+
+APP_FILE = Path(__file__).resolve().parent / "10.13.py"
+PAGES = ["AI助手", "数据输入", "数据查询与管理", "个人信息管理", "荣誉信息管理", "日程管理", "教育经历管理", "系统概览"]
+
+
+class CountingLock:
+    """包装 db.db_lock，统计需要排队等待的次数和总等待时长"""
+
+    def __init__(self, lock):
+        self._lock = lock
+        self._stats_lock = threading.Lock()
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(blocking=False):
+            waited = 0.0
+        else:
+            start = time.perf_counter()
+            if not self._lock.acquire(blocking, timeout):
+                return False
+            waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.acquired += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += waited
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SqliteWaits:
+    """应用连接上每条语句的耗时统计
+
+    db.conn 和 read_conn() 都以 timeout=30 连接，遇到锁时 SQLite 会静默重试而不是报
+    "database is locked"，所以只能按耗时判断：超过阈值的语句记为一次（疑似）锁等待。
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.slow = Counter()
+        self.slow_seconds = Counter()
+        self.max_seconds = Counter()
+
+    def record(self, label, seconds):
+        with self._lock:
+            self.calls[label] += 1
+            self.max_seconds[label] = max(self.max_seconds[label], seconds)
+            if seconds >= self.threshold:
+                self.slow[label] += 1
+                self.slow_seconds[label] += seconds
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, *args):
+        return self.connection._timed(super().execute, args)
+
+    def executemany(self, *args):
+        return self.connection._timed(super().executemany, args)
+
+
+class TimedConnection(sqlite3.Connection):
+    """给每条 execute 计时的连接；pandas 只认 sqlite3.Connection，所以用子类而不是包装对象"""
+
+    waits = None
+    label = "读连接"
+
+    def _timed(self, func, args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            if self.waits is not None:
+                self.waits.record(self.label, time.perf_counter() - start)
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TimedCursor)
+
+    def execute(self, *args):
+        return self._timed(super().execute, args)
+
+    def executemany(self, *args):
+        return self._timed(super().executemany, args)
+
+
+class _TimedSqlite:
+    """只替换 db 模块里的 sqlite3，让 db.conn 和 read_conn() 建出的连接都带计时"""
+
+    def __getattr__(self, name):
+        return getattr(sqlite3, name)
+
+    @staticmethod
+    def connect(*args, **kwargs):
+        return sqlite3.connect(*args, factory=TimedConnection, **kwargs)
+
+
+def instrument_connections(db, waits):
+    """把 db.conn 换成带计时的连接，之后各线程新建的 read_conn() 也带计时"""
+    TimedConnection.waits = waits
+    db.sqlite3 = _TimedSqlite()
+    old_conn, db.conn = db.conn, db.init_database(db.DB_PATH)
+    db.conn.label = "写连接"
+    old_conn.close()
+
+
+def seed_database(db, rows):
+    """按比例预填各表，日程中一半为已完成，便于覆盖归档和筛选路径"""
+    db.insert_records([{"title": f"记录{i}", "category": random.choice(["荣誉", "竞赛", "证书", "其他"]),
+                        "notes": f"压测备注{i}", "priority": random.choice("低中高"),
+                        "progress": random.randint(0, 100), "created_at": "2024-01-01 00:00:00",
+                        "attachment": ""} for i in range(rows)])
+    db.insert_honors([(1, random.randint(1, 5), f"荣誉{i}", "压测", "机构", "2024-01-01",
+                       "中", 100, "") for i in range(rows // 2)])
+    db.insert_schedules([(1, f"日程{i}", "压测", f"2024-{i % 12 + 1:02d}-01 09:00", None, "会议室",
+                          random.choice(["待开始", "已完成"]), "中", "") for i in range(rows // 2)])
+    db.insert_educations([(1, f"学校{i}", "学士", "计算机", "2019-09-01", "2023-06-30", 3.5, "")
+                          for i in range(max(1, rows // 20))])
+
+
+def _by_label(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(label)
+
+
+def _switch_page(at, page):
+    if not at.sidebar.radio:
+        raise RuntimeError("上一次 rerun 没有输出侧边栏，会话已失效")
+    at.sidebar.radio[0].set_value(page).run()
+
+
+def _page_actions(page, session_no, round_no):
+    """返回在该页面上要执行的操作：[(名称, 函数(at))]，函数负责设置控件，调用方负责 run()"""
+    tag = f"压测{session_no}-{round_no}"
+    if page == "数据输入":
+        return [("提交表单", lambda at: (_by_label(at.text_input, "标题 *").input(tag),
+                                      _by_label(at.button, "保存").click()))]
+    if page == "数据查询与管理":
+        return [("搜索", lambda at: _by_label(at.text_input, "搜索关键字").input("压测"))]
+    if page == "荣誉信息管理":
+        return [("提交表单", lambda at: (_by_label(at.text_input, "荣誉标题 *").input(tag),
+                                      _by_label(at.button, "添加荣誉").click()))]
+    if page == "日程管理":
+        return [("提交表单", lambda at: (_by_label(at.text_input, "日程标题 *").input(tag),
+                                      _by_label(at.text_input, "开始时间").input("2030-01-01 09:00"),
+                                      _by_label(at.button, "添加日程").click())),
+                ("筛选", lambda at: _by_label(at.selectbox, "按状态筛选").select("已完成"))]
+    if page == "教育经历管理":
+        return [("提交表单", lambda at: (_by_label(at.text_input, "学校/机构名称 *").input(tag),
+                                      _by_label(at.button, "添加教育经历").click()))]
+    return []
+
+
+def run_session(session_no, rounds, timeout, results, errors, keep_alive):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_FILE), default_timeout=timeout)
+
+    def timed(page, action, step):
+        """执行一步并计时；返回 False 表示会话已不可用（超时或找不到控件）"""
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            errors[(page, action)].append(repr(e))
+            return False
+        results[(page, action)].append(time.perf_counter() - start)
+        for exc in at.exception:
+            errors[(page, action)].append(exc.message)
+        return True
+
+    keep_alive.append(at)
+    if not timed("启动", "首次加载", at.run):
+        return
+    for round_no in range(rounds):
+        for page in PAGES:
+            if not timed(page, "切换页面", lambda: _switch_page(at, page)):
+                return
+            for action, prepare in _page_actions(page, session_no, round_no):
+                if not timed(page, action, lambda: (prepare(at), at.run())):
+                    return
+
+
+def measure_session_memory(sessions, timeout):
+    """顺序跑几个会话，用 tracemalloc 统计每个会话点完一轮后仍占用的内存
+
+    tracemalloc 会让脚本慢一个数量级，放在并发阶段里会干扰 AppTest，所以单独测量。
+    """
+    results, errors, keep_alive = defaultdict(list), defaultdict(list), []
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    for i in range(sessions):
+        run_session(i, 1, timeout, results, errors, keep_alive)
+    retained = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained / max(1, sessions), peak
+
+
+def external_writer(db_path, stop, stats):
+    """另开一个连接反复持有写锁，制造跨连接的 SQLite 锁竞争；拿锁超过 1ms 记为一次等待"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    backoff = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            stats["locked"] += 1
+            # 拿锁失败时退避，避免空转占满一个核、反过来拖慢被测的页面
+            stop.wait(backoff)
+            backoff = min(backoff * 2, 1.0)
+            continue
+        backoff = 0.01
+        waited = time.perf_counter() - start
+        stats["transactions"] += 1
+        if waited > 0.001:
+            stats["waits"] += 1
+            stats["wait_seconds"] += waited
+        conn.execute("UPDATE personal_info SET occupation = occupation WHERE id = 1")
+        time.sleep(0.005)
+        conn.execute("COMMIT")
+        time.sleep(0.01)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 页面并发压测")
+    parser.add_argument("--sessions", type=int, default=10, help="并发会话数")
+    parser.add_argument("--rounds", type=int, default=2, help="每个会话点击所有页面的轮数")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="预填的记录条数")
+    parser.add_argument("--timeout", type=float, default=60, help="单次 rerun 超时（秒）")
+    parser.add_argument("--db", help="使用指定的数据库文件（默认在临时目录新建）")
+    parser.add_argument("--external-writer", action="store_true", help="同时用另一个连接持续写入")
+    parser.add_argument("--memory-sessions", type=int, default=2, help="单独测量内存时顺序运行的会话数")
+    parser.add_argument("--slow-ms", type=float, default=50, help="应用连接上单条语句超过该耗时记为一次锁等待")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pm_loadtest_")
+    db_path = args.db or os.path.join(workdir, "loadtest.db")
+    # 必须在导入 db 之前设置，AppTest 里的页面脚本会复用同一个 db 模块
+    os.environ["PM_DB_PATH"] = db_path
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    warnings.filterwarnings("ignore", message="Glyph .* missing from font")
+    sys.path.insert(0, str(APP_FILE.parent))
+    import db
+
+    if not args.db:
+        seed_database(db, args.seed_rows)
+    lock = db.db_lock = CountingLock(db.db_lock)
+    waits = SqliteWaits(args.slow_ms / 1000)
+    instrument_connections(db, waits)
+
+    results, errors, keep_alive = defaultdict(list), defaultdict(list), []
+    stop = threading.Event()
+    writer, writer_stats = None, Counter()
+    if args.external_writer:
+        writer = threading.Thread(target=external_writer, args=(db_path, stop, writer_stats), daemon=True)
+        writer.start()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_session,
+                                args=(i, args.rounds, args.timeout, results, errors, keep_alive))
+               for i in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    if writer:
+        writer.join()
+    keep_alive.clear()
+    # 内存测量阶段不计入锁等待统计
+    TimedConnection.waits = None
+    session_bytes, peak = measure_session_memory(args.memory_sessions, args.timeout)
+
+    print(f"会话数: {args.sessions}  轮数: {args.rounds}  预填: {args.seed_rows} 行  总耗时: {elapsed:.1f}s")
+    print(f"{'页面':<10}{'操作':<8}{'次数':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'异常':>6}")
+    for key in sorted(set(results) | set(errors), key=lambda k: (PAGES.index(k[0]) if k[0] in PAGES else -1, k[1])):
+        values = results.get(key, [])
+        cols = [percentile(values, p) * 1000 for p in (50, 95, 99, 100)] if values else [0.0] * 4
+        print(f"{key[0]:<10}{key[1]:<8}{len(values):>6}" + "".join(f"{v:>10.1f}" for v in cols)
+              + f"{len(errors.get(key, [])):>6}")
+
+    locked = sum(1 for msgs in errors.values() for m in msgs if "database is locked" in str(m))
+    print(f"\nPython db_lock 争用: 获取 {lock.acquired} 次，需排队 {lock.waits} 次，"
+          f"累计排队 {lock.wait_seconds * 1000:.1f}ms")
+    for label in sorted(waits.calls):
+        print(f"SQLite {label}: 语句 {waits.calls[label]} 次，超过 {args.slow_ms:g}ms 的 {waits.slow[label]} 次"
+              f"（累计 {waits.slow_seconds[label] * 1000:.1f}ms，最长 {waits.max_seconds[label] * 1000:.1f}ms）")
+    print(f"SQLite 'database is locked' 错误: {locked} 次")
+    if writer:
+        print(f"外部写连接: 事务 {writer_stats['transactions']} 次，等锁 {writer_stats['waits']} 次"
+              f"（累计 {writer_stats['wait_seconds'] * 1000:.1f}ms），拿锁失败 {writer_stats['locked']} 次")
+    print(f"每个会话内存: {session_bytes / 1024:.1f} KiB（测量阶段峰值 {peak / 1024 / 1024:.1f} MiB）")
+
+    samples = Counter(str(m).splitlines()[0] for msgs in errors.values() for m in msgs)
+    for message, count in samples.most_common(5):
+        print(f"  异常 x{count}: {message[:120]}")
+
+
+if __name__ == "__main__":
+    main()
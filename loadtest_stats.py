@@ -0,0 +1,9 @@
+"""压测脚本共用的统计函数（loadtest_api.py / loadtest_app.py）"""
+
+
+def percentile(values, pct):
+    """最近秩法分位数，空列表返回 0"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
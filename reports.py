@@ -0,0 +1,200 @@
+"""个人简历报告：个人信息 + 教育经历 + 按分类分组的荣誉 + 近期日程
+
+报告在后台线程池中生成，产物缓存在数据库旁的 <库名>_reports/ 目录下，文件名里带着相关表的数据版本号，
+数据没有变化时直接复用上次的文件。
+
+    python reports.py --format html --all           # 并行为所有人生成
+    python reports.py --format md --person 1 2
+"""
+import argparse
+import hashlib
+import html
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+import db
+
+REPORT_DIR = db.DB_PATH.with_name(db.DB_PATH.stem + "_reports")
+REPORT_FORMATS = {"md": "text/markdown", "html": "text/html", "pdf": "application/pdf"}
+REPORT_TABLES = ("personal_info", "education", "honors", "categories", "schedules")
+REPORT_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+_pending = {}
+_pending_lock = threading.Lock()
+
+PERSON_FIELDS = [("gender", "性别"), ("birth_date", "出生日期"), ("email", "邮箱"), ("phone", "电话"),
+                 ("address", "地址"), ("occupation", "职业"), ("education_level", "教育程度")]
+
+
+def _connect():
+    # 每个后台任务使用自己的只读连接，不和页面共用的连接抢锁
+    # as_uri() 会转义路径里的 ? # % 等字符，直接拼接会打开错误的文件
+    return sqlite3.connect(db.DB_PATH.resolve().as_uri() + "?mode=ro", uri=True, timeout=30)
+
+
+def cache_key(person_id, fmt, versions):
+    """缓存键：人员、格式、相关表的数据版本号，以及日期（“近期日程”随日期变化）"""
+    payload = json.dumps({"person": person_id, "format": fmt, "versions": versions,
+                          "date": datetime.now().strftime("%Y-%m-%d")}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def report_path(person_id, fmt, key):
+    return REPORT_DIR / f"person{person_id}_{key}.{fmt}"
+
+
+def load_report_data(conn, person_id):
+    person = pd.read_sql_query("SELECT * FROM personal_info WHERE id = ?", conn, params=(person_id,))
+    if person.empty:
+        raise ValueError(f"不存在 id 为 {person_id} 的个人信息")
+    education = pd.read_sql_query(
+        "SELECT * FROM education WHERE person_id = ? ORDER BY start_date DESC", conn, params=(person_id,))
+    honors = pd.read_sql_query("""
+    SELECT h.*, coalesce(c.name, '未分类') as category_name
+    FROM honors h LEFT JOIN categories c ON h.category_id = c.id
+    WHERE h.person_id = ?
+    ORDER BY c.id, h.issue_date DESC
+    """, conn, params=(person_id,))
+    schedules = pd.read_sql_query("""
+    SELECT * FROM schedules
+    WHERE person_id = ? AND start_time >= date('now') AND status NOT IN ('已完成', '已取消')
+    ORDER BY start_time LIMIT 20
+    """, conn, params=(person_id,))
+    return {"person": person.iloc[0].to_dict(), "education": education, "honors": honors, "schedules": schedules}
+
+
+def _text(value):
+    return "" if value is None or pd.isna(value) else str(value)
+
+
+def render_markdown(data):
+    person = data["person"]
+    lines = [f"# {_text(person['name'])}", ""]
+    lines += [f"- **{label}：** {_text(person.get(field))}" for field, label in PERSON_FIELDS]
+
+    lines += ["", "## 教育经历", ""]
+    for _, e in data["education"].iterrows():
+        period = f"{_text(e['start_date'])} ~ {_text(e['end_date'])}"
+        lines.append(f"- **{_text(e['institution'])}** {_text(e['degree'])} {_text(e['major'])}（{period}）"
+                     + (f"，GPA {e['gpa']}" if _text(e['gpa']) else ""))
+        if _text(e["achievements"]):
+            lines.append(f"  - {_text(e['achievements'])}")
+
+    lines += ["", "## 荣誉", ""]
+    for category, group in data["honors"].groupby("category_name", sort=False):
+        lines += [f"### {category}", ""]
+        for _, h in group.iterrows():
+            lines.append(f"- {_text(h['title'])}（{_text(h['issuing_authority'])} {_text(h['issue_date'])}）")
+        lines.append("")
+
+    lines += ["## 近期日程", ""]
+    for _, s in data["schedules"].iterrows():
+        lines.append(f"- {_text(s['start_time'])} {_text(s['title'])} @ {_text(s['location'])}")
+    lines += ["", f"_生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}_", ""]
+    return "\n".join(lines)
+
+
+def render_html(data):
+    esc = lambda v: html.escape(_text(v))  # noqa: E731
+    person = data["person"]
+    parts = [
+        "<!DOCTYPE html><html lang='zh-CN'><head><meta charset='utf-8'>",
+        f"<title>{esc(person['name'])}</title>",
+        "<style>body{font-family:sans-serif;max-width:800px;margin:2em auto;}"
+        "h2{border-bottom:1px solid #ccc;}td{padding:2px 12px 2px 0;}</style></head><body>",
+        f"<h1>{esc(person['name'])}</h1><table>",
+    ]
+    parts += [f"<tr><td><b>{label}</b></td><td>{esc(person.get(field))}</td></tr>" for field, label in PERSON_FIELDS]
+    parts.append("</table><h2>教育经历</h2><ul>")
+    for _, e in data["education"].iterrows():
+        parts.append(f"<li><b>{esc(e['institution'])}</b> {esc(e['degree'])} {esc(e['major'])}"
+                     f"（{esc(e['start_date'])} ~ {esc(e['end_date'])}）"
+                     + (f"<br>{esc(e['achievements'])}" if _text(e["achievements"]) else "") + "</li>")
+    parts.append("</ul><h2>荣誉</h2>")
+    for category, group in data["honors"].groupby("category_name", sort=False):
+        parts.append(f"<h3>{esc(category)}</h3><ul>")
+        parts += [f"<li>{esc(h['title'])}（{esc(h['issuing_authority'])} {esc(h['issue_date'])}）</li>"
+                  for _, h in group.iterrows()]
+        parts.append("</ul>")
+    parts.append("<h2>近期日程</h2><ul>")
+    parts += [f"<li>{esc(s['start_time'])} {esc(s['title'])} @ {esc(s['location'])}</li>"
+              for _, s in data["schedules"].iterrows()]
+    parts.append(f"</ul><p><i>生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}</i></p></body></html>")
+    return "\n".join(parts)
+
+
+def _write(path, fmt, data):
+    tmp_path = path.with_name(path.name + ".tmp")
+    if fmt == "md":
+        tmp_path.write_text(render_markdown(data), encoding="utf-8")
+    elif fmt == "html":
+        tmp_path.write_text(render_html(data), encoding="utf-8")
+    else:
+        try:
+            from weasyprint import HTML
+        except ImportError:
+            raise RuntimeError("生成 PDF 需要安装 weasyprint")
+        HTML(string=render_html(data)).write_pdf(str(tmp_path))
+    tmp_path.replace(path)
+
+
+def build_report(person_id, fmt="html"):
+    """生成（或直接复用缓存的）报告文件，返回文件路径"""
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"不支持的报告格式：{fmt}")
+    conn = _connect()
+    try:
+        key = cache_key(person_id, fmt, db.get_data_versions(REPORT_TABLES, connection=conn))
+        path = report_path(person_id, fmt, key)
+        if path.exists():
+            return path
+        data = load_report_data(conn, person_id)
+    finally:
+        conn.close()
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    _write(path, fmt, data)
+    # 同一个人同一格式只保留最新的一份
+    for old in REPORT_DIR.glob(f"person{person_id}_*.{fmt}"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
+
+
+def submit_report(person_id, fmt="html"):
+    """在后台线程池中生成报告，返回 Future；同一份报告正在生成时复用同一个 Future"""
+    with _pending_lock:
+        future = _pending.get((person_id, fmt))
+        if future is None or future.done():
+            future = _executor.submit(build_report, person_id, fmt)
+            _pending[(person_id, fmt)] = future
+        return future
+
+
+def generate_reports(person_ids, fmt="html"):
+    """并行为多个人生成报告，返回 {person_id: 路径或异常}"""
+    futures = {pid: submit_report(pid, fmt) for pid in person_ids}
+    results = {}
+    for pid, future in futures.items():
+        try:
+            results[pid] = future.result()
+        except Exception as e:
+            results[pid] = e
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成个人简历报告")
+    parser.add_argument("--format", choices=list(REPORT_FORMATS), default="html")
+    parser.add_argument("--person", type=int, nargs="*", default=[])
+    parser.add_argument("--all", action="store_true", help="为所有人生成")
+    args = parser.parse_args()
+    person_ids = db.get_personal_info()["id"].tolist() if args.all else args.person
+    for pid, result in generate_reports(person_ids, args.format).items():
+        print(f"person {pid}: {result}")
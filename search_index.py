@@ -0,0 +1,224 @@
+"""AI助手查询用的本地检索索引
+
+对 records / honors / schedules / education 的标题、备注、描述做字符 n-gram
+TF-IDF。词频按 CSR 稀疏格式存成三个 NumPy 数组（indptr / indices / data），
+内存只和非零项个数有关；idf 加权、按行归一化后的权重以及按 n-gram 排列的倒排表
+在索引变化后第一次查询时算一次并缓存，查询只累加与查询共有的 n-gram 对应的行。
+索引持久化到数据库旁边的 .npz 文件，启动时直接加载。每次查询前 sync() 先比较
+data_versions 中各表的版本号（由触发器维护），只扫描有变化的表，并且只对新增、删除
+或文本有变化的行重新分词；写回磁盘在后台延迟合并进行，不占用查询的时间。
+"""
+import atexit
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from db import DB_PATH, get_data_versions
+
+INDEX_PATH = DB_PATH.with_name(DB_PATH.stem + "_search_index.npz")
+NGRAM_RANGE = (1, 3)
+SAVE_DELAY = 5.0    # 有变化后最多等这么久再写盘，期间的多次变化合并成一次写入
+
+# 参与检索的表 -> 拼接文本用的 SQL 表达式
+INDEXED_TABLES = {
+    "records": "coalesce(title, '') || ' ' || coalesce(category, '') || ' ' || coalesce(notes, '')",
+    "honors": "coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(issuing_authority, '')",
+    "schedules": "coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(location, '')",
+    "education": "coalesce(institution, '') || ' ' || coalesce(degree, '') || ' ' || coalesce(major, '')"
+                 " || ' ' || coalesce(achievements, '')",
+}
+
+_SPLIT_RE = re.compile(r"[\W_]+")
+
+
+def char_ngrams(text):
+    """把文本切成字符 n-gram，按标点和空白分段，不跨段"""
+    grams = []
+    for chunk in _SPLIT_RE.split(str(text).lower()):
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+            grams.extend(chunk[i:i + n] for i in range(len(chunk) - n + 1))
+    return grams
+
+
+class SearchIndex:
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.vocab = {}
+        self.keys = []          # 每行对应的 (table, id)
+        self.hashes = []        # 每行文本的 crc32，用于判断是否需要重新分词
+        # CSR 词频矩阵：第 i 行的非零项为 indices[indptr[i]:indptr[i + 1]] / data[...]
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float32)
+        self._positions = {}
+        self._weights = None    # 查询用的缓存，索引有变化时置空
+        self._versions = {}     # 上次同步时各表的数据版本号
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """从磁盘加载索引，文件不存在、已损坏或是旧格式时返回空索引"""
+        index = cls(path)
+        if not path.exists():
+            return index
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                index.indptr = data["indptr"]
+                index.indices = data["indices"]
+                index.data = data["data"]
+                index.vocab = {gram: i for i, gram in enumerate(data["vocab"].tolist())}
+                index.keys = [(t, int(i)) for t, i in zip(data["tables"].tolist(), data["ids"].tolist())]
+                index.hashes = data["hashes"].tolist()
+        except (OSError, KeyError, ValueError):
+            return cls(path)
+        index._positions = {key: pos for pos, key in enumerate(index.keys)}
+        return index
+
+    def save(self):
+        with self._lock:
+            # 数组只会被整体替换、不会原地修改，持锁取一份快照后即可在锁外压缩写盘
+            self._dirty = False
+            arrays = dict(
+                indptr=self.indptr,
+                indices=self.indices,
+                data=self.data,
+                vocab=np.array(sorted(self.vocab, key=self.vocab.get), dtype=str),
+                tables=np.array([t for t, _ in self.keys], dtype=str),
+                ids=np.array([i for _, i in self.keys], dtype=np.int64),
+                hashes=np.array(self.hashes, dtype=np.int64),
+            )
+        tmp_path = self.path.with_name(self.path.name + ".tmp.npz")
+        np.savez_compressed(tmp_path, **arrays)
+        tmp_path.replace(self.path)
+
+    def _schedule_save(self):
+        """延迟 SAVE_DELAY 秒在后台写盘；已有待写入的任务时不重复安排"""
+        if self._save_timer is None:
+            atexit.register(self.flush)
+        elif self._save_timer.is_alive():
+            return
+        self._save_timer = threading.Timer(SAVE_DELAY, self.save)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """立即写出尚未落盘的变化（进程退出时自动调用）"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        if self._dirty:
+            self.save()
+
+    def _vectorize(self, text, grow):
+        counts = {}
+        for gram in char_ngrams(text):
+            col = self.vocab.get(gram)
+            if col is None:
+                if not grow:
+                    continue
+                col = self.vocab[gram] = len(self.vocab)
+            counts[col] = counts.get(col, 0) + 1
+        return counts
+
+    def _add(self, items):
+        """items 为 [(key, text, text_hash), ...]，一次性追加到矩阵末尾"""
+        rows = [self._vectorize(text, grow=True) for _, text, _ in items]
+        lengths = np.array([len(counts) for counts in rows], dtype=np.int64)
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths)])
+        self.indices = np.concatenate([self.indices] + [np.fromiter(c, np.int32, len(c)) for c in rows])
+        self.data = np.concatenate([self.data] + [np.fromiter(c.values(), np.float32, len(c)) for c in rows])
+        for key, _, text_hash in items:
+            self._positions[key] = len(self.keys)
+            self.keys.append(key)
+            self.hashes.append(text_hash)
+        self._weights = None
+
+    def _remove(self, keys):
+        drop = np.zeros(len(self.keys), dtype=bool)
+        drop[[self._positions[k] for k in keys]] = True
+        lengths = np.diff(self.indptr)
+        keep_entries = np.repeat(~drop, lengths)
+        self.indices = self.indices[keep_entries]
+        self.data = self.data[keep_entries]
+        self.indptr = np.concatenate([[0], np.cumsum(lengths[~drop])])
+        self.keys = [k for pos, k in enumerate(self.keys) if not drop[pos]]
+        self.hashes = [h for pos, h in enumerate(self.hashes) if not drop[pos]]
+        self._positions = {key: pos for pos, key in enumerate(self.keys)}
+        self._weights = None
+
+    def _query_weights(self):
+        """idf 和归一化后的倒排表，只在索引变化后的第一次查询时重新计算"""
+        if self._weights is None:
+            n_docs, n_terms = len(self.keys), len(self.vocab)
+            rows = np.repeat(np.arange(n_docs), np.diff(self.indptr))
+            df = np.bincount(self.indices, minlength=n_terms)
+            idf = np.log((1 + n_docs) / (1 + df)).astype(np.float32) + 1
+            weights = np.log1p(self.data) * idf[self.indices]
+            norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+            weights = weights / np.where(norms > 0, norms, 1)[rows]
+            # 按 n-gram 重排成倒排表：第 c 个 n-gram 出现在 post_rows[post_ptr[c]:post_ptr[c + 1]]
+            order = np.argsort(self.indices, kind="stable")
+            post_ptr = np.concatenate([[0], np.cumsum(df)])
+            tables = np.array([t for t, _ in self.keys], dtype=str)
+            self._weights = (idf, post_ptr, rows[order], weights[order].astype(np.float32), tables)
+        return self._weights
+
+    def sync(self, conn):
+        """与数据库对齐，返回是否有变化
+
+        只扫描 data_versions 版本号变过的表，其中增删改过的行才重新分词；
+        有变化时安排后台写盘，不在查询路径上同步写文件。
+        """
+        versions = get_data_versions(tuple(INDEXED_TABLES), connection=conn)
+        with self._lock:
+            tables = [t for t in INDEXED_TABLES if versions.get(t) != self._versions.get(t)]
+            if not tables:
+                return False
+            current = {}
+            for table in tables:
+                for row_id, text in conn.execute(f"SELECT id, {INDEXED_TABLES[table]} FROM {table}"):
+                    current[(table, row_id)] = (text, zlib.crc32(text.encode("utf-8")))
+
+            stale = [k for pos, k in enumerate(self.keys)
+                     if k[0] in tables and (k not in current or current[k][1] != self.hashes[pos])]
+            if stale:
+                self._remove(stale)
+            added = [(k, *current[k]) for k in current if k not in self._positions]
+            if added:
+                self._add(added)
+
+            self._versions.update(versions)
+            changed = bool(stale or added)
+            if changed:
+                self._dirty = True
+                self._schedule_save()
+            return changed
+
+    def search(self, query, k=20, table=None, min_score=0.05):
+        """返回 [(table, id, score), ...]，按余弦相似度降序"""
+        with self._lock:
+            if not self.keys:
+                return []
+            q_counts = self._vectorize(query, grow=False)
+            if not q_counts:
+                return []
+            idf, post_ptr, post_rows, post_weights, tables = self._query_weights()
+            cols = np.fromiter(q_counts, np.int64, len(q_counts))
+            q = np.log1p(np.fromiter(q_counts.values(), np.float32, len(q_counts))) * idf[cols]
+            q /= np.linalg.norm(q)
+
+            # 只累加与查询共有的 n-gram 对应的行
+            hit_rows = np.concatenate([post_rows[post_ptr[c]:post_ptr[c + 1]] for c in cols])
+            hit_weights = np.concatenate([post_weights[post_ptr[c]:post_ptr[c + 1]] * w for c, w in zip(cols, q)])
+            n_docs = len(self.keys)
+            scores = np.bincount(hit_rows, weights=hit_weights, minlength=n_docs)
+
+            if table is not None:
+                scores = np.where(tables == table, scores, 0)
+            k = min(k, n_docs)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(*self.keys[i], float(scores[i])) for i in top if scores[i] >= min_score]
@@ -0,0 +1,83 @@
+"""本地模型桩服务，模拟 chat/completions 接口，用于在不访问外网的情况下调试批量导入
+
+    python stub_llm_server.py --port 8900 --delay 0.2 --fail-rate 0.1
+    LLM_API_URL=http://127.0.0.1:8900/v1/chat/completions streamlit run 10.13.py
+
+按关键字粗略判断条目属于哪张表，--delay 模拟模型耗时，--fail-rate 按比例返回 429 以验证重试。
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_DATE_RE = re.compile(r"(\d{4})[-./年](\d{1,2})(?:[-./月](\d{1,2}))?")
+_ITEM_RE = re.compile(r"内容：(.*)\s*$", re.S)
+
+
+def fake_extract(item):
+    dates = ["-".join(part.zfill(2) for part in m.groups() if part) for m in _DATE_RE.finditer(item)]
+    if any(word in item for word in ("大学", "学院", "中学", "学校")):
+        return {"table": "education", "data": {
+            "institution": item.split()[0], "degree": "学士" if "本科" in item else None,
+            "major": None, "start_date": dates[0] if dates else None,
+            "end_date": dates[1] if len(dates) > 1 else None, "gpa": None, "achievements": None}}
+    if any(word in item for word in ("会议", "面试", "考试", "截止", "日程")):
+        return {"table": "schedules", "data": {
+            "title": item, "start_time": (dates[0] + " 09:00") if dates else None,
+            "status": "待开始", "priority": "中"}}
+    return {"table": "honors", "data": {
+        "title": item, "category": "学术荣誉" if any(w in item for w in ("奖学金", "竞赛", "杯")) else "其他荣誉",
+        "issue_date": dates[0] if dates else None, "priority": "中", "progress": 100}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            time.sleep(self.delay)
+            if random.random() < self.fail_rate:
+                self._send(429, {"error": "rate limited"})
+                return
+            prompt = body["messages"][-1]["content"]
+            match = _ITEM_RE.search(prompt)
+            reply = fake_extract(match.group(1).strip() if match else prompt)
+            self._send(200, {"choices": [{"message": {
+                "role": "assistant", "content": json.dumps(reply, ensure_ascii=False)}}]})
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        print(f"[stub] {fmt % args}  (最大并发 {type(self).max_in_flight})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地模型桩服务")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    StubHandler.delay = args.delay
+    StubHandler.fail_rate = args.fail_rate
+    ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler).serve_forever()
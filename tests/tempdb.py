@@ -0,0 +1,14 @@
+"""测试共用的临时数据库：必须在导入 db 之前导入本模块，db 在导入时就会连接数据库
+
+各测试模块都先 import tempdb，同一次运行中所有测试共用这一个临时库，不会动 data/ 下的真实数据。
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+if "db" in sys.modules:
+    raise RuntimeError("tempdb 必须在 db 之前导入")
+
+os.environ["PM_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="pm_test_"), "test.db")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
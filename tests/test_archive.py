@@ -0,0 +1,71 @@
+"""archive.py 的回归检查，在 tempdb 提供的临时数据库上运行
+
+    python -m unittest discover tests
+"""
+import unittest
+
+import tempdb  # noqa: F401  必须在 db 之前导入
+
+import archive
+import db
+
+
+def _ids(table, schema):
+    return {row[0] for row in db.conn.execute(f"SELECT id FROM {schema}.{table}")}
+
+
+class ArchiveExpiredTest(unittest.TestCase):
+    def setUp(self):
+        with db.db_lock, db.conn:
+            for table in db.ARCHIVED_TABLES:
+                db.conn.execute(f"DELETE FROM main.{table}")
+                db.conn.execute(f"DELETE FROM archive.{table}")
+
+    def _schedule(self, title, start_time, end_time, status="已完成"):
+        db.insert_schedule((1, title, "", start_time, end_time, "", status, "中", ""))
+        return db.conn.execute("SELECT max(id) FROM schedules").fetchone()[0]
+
+    def test_blank_end_time_does_not_make_future_schedule_expired(self):
+        blank = self._schedule("未来-空结束时间", "2099-01-01 09:00", "")
+        null = self._schedule("未来-无结束时间", "2099-01-01 09:00", None)
+        old = self._schedule("过去-空结束时间", "2000-01-01 09:00", "")
+        pending = self._schedule("过去-未完成", "2000-01-01 09:00", "", status="待开始")
+
+        archive.archive_table("schedules")
+
+        self.assertEqual(_ids("schedules", "main"), {blank, null, pending})
+        self.assertEqual(_ids("schedules", "archive"), {old})
+
+    def test_blank_created_at_does_not_make_record_expired(self):
+        db.insert_records([
+            {"title": "空创建时间", "category": "其他", "progress": 100, "created_at": ""},
+            {"title": "很久以前", "category": "其他", "progress": 100, "created_at": "2000-01-01 00:00:00"},
+        ])
+
+        archive.archive_table("records")
+
+        titles = lambda schema: {row[0] for row in db.conn.execute(f"SELECT title FROM {schema}.records")}  # noqa: E731
+        self.assertEqual(titles("main"), {"空创建时间"})
+        self.assertEqual(titles("archive"), {"很久以前"})
+
+    def test_rows_already_in_archive_are_removed_from_main_without_loss(self):
+        # 模拟上次归档在复制提交之后、删除之前被中断：同一批 id 两边都有
+        old = self._schedule("上次中断", "2000-01-01 09:00", "2000-01-01 10:00")
+        fresh = self._schedule("本次归档", "2000-02-01 09:00", "2000-02-01 10:00")
+        with db.db_lock, db.conn:
+            db.conn.execute("""
+            INSERT INTO archive.schedules (id, person_id, title, start_time, end_time, status, archived_at)
+            SELECT id, person_id, title, start_time, end_time, status, '2000-01-02' FROM main.schedules WHERE id = ?
+            """, (old,))
+
+        moved = archive.archive_table("schedules")
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(_ids("schedules", "main"), set())
+        self.assertEqual(_ids("schedules", "archive"), {old, fresh})
+        archived_at = db.conn.execute("SELECT archived_at FROM archive.schedules WHERE id = ?", (old,)).fetchone()[0]
+        self.assertEqual(archived_at, "2000-01-02")
+
+
+if __name__ == "__main__":
+    unittest.main()
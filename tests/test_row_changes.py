@@ -0,0 +1,127 @@
+"""批量编辑（diff_rows / apply_row_changes）和 API 版本冲突的检查，在 tempdb 提供的临时数据库上运行
+
+    python -m unittest discover tests
+"""
+import unittest
+
+import numpy as np
+import pandas as pd
+from aiohttp.test_utils import TestClient, TestServer
+
+import tempdb  # noqa: F401  必须在 db 之前导入
+
+import api_server
+import db
+
+
+def _insert_record(title):
+    db.insert_records([{"title": title, "category": "其他", "notes": "", "progress": 0}])
+    return db.conn.execute("SELECT max(id) FROM records").fetchone()[0]
+
+
+def _record(row_id):
+    return db.conn.execute("SELECT title, notes, version FROM records WHERE id = ?", (row_id,)).fetchone()
+
+
+class DiffRowsTest(unittest.TestCase):
+    def test_missing_values_and_numpy_scalars_compare_equal(self):
+        original = pd.DataFrame({"id": [1, 2], "version": [1, 1], "notes": [None, "a"], "progress": [10, 20]})
+        edited = pd.DataFrame({"id": [1, 2], "version": [1, 1], "notes": [np.nan, "a"],
+                               "progress": [np.int64(10), np.float64(20.0)]})
+
+        self.assertEqual(db.diff_rows(original, edited, ["notes", "progress"]), [])
+
+    def test_changed_cells_grouped_by_row_with_python_values(self):
+        original = pd.DataFrame({"id": [1, 2], "version": [3, 5], "notes": ["a", "b"], "progress": [10, 20]})
+        edited = pd.DataFrame({"id": [1, 2], "version": [3, 5], "notes": ["a", "c"], "progress": [15, 20]})
+
+        changes = db.diff_rows(original, edited, ["notes", "progress"])
+
+        self.assertEqual(changes, [{"id": 1, "version": 3, "values": {"progress": 15}},
+                                   {"id": 2, "version": 5, "values": {"notes": "c"}}])
+        self.assertIs(type(changes[0]["values"]["progress"]), int)
+
+
+class ApplyRowChangesTest(unittest.TestCase):
+    def test_matching_versions_update_rows_and_bump_version(self):
+        row_id = _insert_record("原标题")
+
+        db.apply_row_changes("records", [{"id": row_id, "version": 1, "values": {"title": "新标题"}}])
+
+        self.assertEqual(_record(row_id), ("新标题", "", 2))
+
+    def test_one_stale_row_rolls_back_the_whole_batch(self):
+        fresh, stale = _insert_record("甲"), _insert_record("乙")
+        db.update_data(stale, "notes", "别人改过")
+
+        with self.assertRaises(db.StaleRowError) as ctx:
+            db.apply_row_changes("records", [
+                {"id": fresh, "version": 1, "values": {"title": "甲2"}},
+                {"id": stale, "version": 1, "values": {"title": "乙2"}},
+            ])
+
+        self.assertEqual(ctx.exception.row_ids, [stale])
+        self.assertEqual(_record(fresh), ("甲", "", 1))
+        self.assertEqual(_record(stale), ("乙", "别人改过", 2))
+
+    def test_deleted_row_is_reported_as_stale(self):
+        row_id = _insert_record("将被删除")
+        db.delete_data(row_id)
+
+        with self.assertRaises(db.StaleRowError):
+            db.apply_row_changes("records", [{"id": row_id, "version": 1, "values": {"title": "x"}}])
+
+    def test_columns_outside_whitelist_are_rejected(self):
+        row_id = _insert_record("白名单")
+
+        with self.assertRaises(ValueError):
+            db.apply_row_changes("records", [{"id": row_id, "version": 1, "values": {"created_at": "2000-01-01"}}])
+        with self.assertRaises(ValueError):
+            db.apply_row_changes("records", [{"id": row_id, "version": 1, "values": {"version": 99}}])
+        self.assertEqual(_record(row_id), ("白名单", "", 1))
+
+
+class BatchPatchApiTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.client = TestClient(TestServer(api_server.create_app()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def _patch(self, changes):
+        resp = await self.client.patch("/api/records/batch", json={"changes": changes})
+        return resp.status, await resp.json()
+
+    async def test_stale_version_returns_409_with_ids(self):
+        fresh, stale = _insert_record("丙"), _insert_record("丁")
+        db.update_data(stale, "notes", "别人改过")
+
+        status, body = await self._patch([{"id": fresh, "version": 1, "values": {"title": "丙2"}},
+                                          {"id": stale, "version": 1, "values": {"title": "丁2"}}])
+
+        self.assertEqual(status, 409)
+        self.assertEqual(body["stale_ids"], [stale])
+        self.assertEqual(_record(fresh), ("丙", "", 1))
+
+    async def test_current_version_is_applied(self):
+        row_id = _insert_record("戊")
+
+        status, body = await self._patch([{"id": row_id, "version": 1, "values": {"notes": "已更新"}}])
+
+        self.assertEqual((status, body), (200, {"updated": 1}))
+        self.assertEqual(_record(row_id), ("戊", "已更新", 2))
+
+    async def test_empty_values_and_bad_types_return_400(self):
+        row_id = _insert_record("己")
+
+        for change in ({"id": row_id, "version": 1, "values": {}},
+                       {"id": str(row_id), "version": 1, "values": {"title": "x"}},
+                       {"id": row_id, "version": 1, "values": {"notes": [1]}}):
+            status, _ = await self._patch([change])
+            self.assertEqual(status, 400, change)
+        self.assertEqual(_record(row_id), ("己", "", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
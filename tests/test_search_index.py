@@ -0,0 +1,110 @@
+"""检索索引增量同步和持久化的检查，在 tempdb 提供的临时数据库上运行
+
+    python -m unittest discover tests
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+import tempdb  # noqa: F401  必须在 db 之前导入
+
+import db
+from search_index import SearchIndex
+
+
+class RecordingConnection:
+    """转发到读连接，并记下执行过的 SQL，用来确认 sync 扫描了哪些表"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements = []
+
+    def execute(self, sql, *args):
+        self.statements.append(sql)
+        return self._conn.execute(sql, *args)
+
+    def scanned_tables(self):
+        return {sql.rsplit("FROM ", 1)[1].split()[0] for sql in self.statements if sql.startswith("SELECT id,")}
+
+
+def _insert_honor(title):
+    db.insert_honors([(1, 1, title, "", "学校", "2024-01-01", "中", 100, "")])
+    return db.conn.execute("SELECT max(id) FROM honors").fetchone()[0]
+
+
+def _insert_record(title):
+    db.insert_records([{"title": title, "category": "其他"}])
+    return db.conn.execute("SELECT max(id) FROM records").fetchone()[0]
+
+
+class SearchIndexSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp(prefix="pm_index_")) / "index.npz"
+        self.index = SearchIndex(self.path)
+        self.index.sync(db.read_conn())
+
+    def tearDown(self):
+        if self.index._save_timer is not None:
+            self.index._save_timer.cancel()
+
+    def _sync(self):
+        conn = RecordingConnection(db.read_conn())
+        changed = self.index.sync(conn)
+        return changed, conn.scanned_tables()
+
+    def _hits(self, query, table=None):
+        return {(t, i) for t, i, _ in self.index.search(query, k=50, table=table)}
+
+    def test_only_tables_with_moved_versions_are_rescanned(self):
+        self.assertEqual(self._sync(), (False, set()))
+
+        db.insert_chat_message("test", "user", "不在索引里的表")
+        self.assertEqual(self._sync(), (False, set()))
+
+        honor_id = _insert_honor("全国大学生数学建模竞赛一等奖")
+        changed, scanned = self._sync()
+        self.assertTrue(changed)
+        self.assertEqual(scanned, {"honors"})
+        self.assertIn(("honors", honor_id), self._hits("数学建模竞赛"))
+
+    def test_edited_deleted_and_inserted_rows_are_reindexed(self):
+        edited, deleted = _insert_record("蓝桥杯省赛二等奖"), _insert_record("英语六级证书")
+        self.index.sync(db.read_conn())
+        self.assertIn(("records", edited), self._hits("蓝桥杯"))
+
+        db.update_data(edited, "title", "程序设计天梯赛金奖")
+        db.delete_data(deleted)
+        inserted = _insert_record("机器人大赛特等奖")
+        changed, scanned = self._sync()
+
+        self.assertTrue(changed)
+        self.assertEqual(scanned, {"records"})
+        self.assertNotIn(("records", edited), self._hits("蓝桥杯"))
+        self.assertIn(("records", edited), self._hits("天梯赛"))
+        self.assertNotIn(("records", deleted), self.index._positions)
+        self.assertNotIn(("records", deleted), self._hits("英语六级"))
+        self.assertIn(("records", inserted), self._hits("机器人大赛", table="records"))
+        self.assertEqual(len(self.index.keys), len(self.index.indptr) - 1)
+
+    def test_saved_index_reloads_with_identical_results(self):
+        _insert_honor("国家奖学金")
+        _insert_record("奖学金申请材料")
+        self.index.sync(db.read_conn())
+        self.index.flush()
+
+        reloaded = SearchIndex.load(self.path)
+
+        self.assertEqual(reloaded.keys, self.index.keys)
+        for query in ("奖学金", "国家", "申请材料"):
+            self.assertEqual(reloaded.search(query, k=10), self.index.search(query, k=10))
+        # 重新加载后首次同步只做核对，不会把已有的行当成变化
+        self.assertFalse(reloaded.sync(db.read_conn()))
+
+    def test_unreadable_file_loads_as_empty_index(self):
+        self.path.write_bytes(b"not an npz file")
+
+        self.assertEqual(SearchIndex.load(self.path).keys, [])
+
+
+if __name__ == "__main__":
+    unittest.main()